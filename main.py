@@ -2,18 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import os
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
-from slack_sdk import WebClient
+import re
+import asyncio
+import logging
+import hashlib
+import shelve
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from slack_bolt.async_app import AsyncApp
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_sdk.web.async_client import AsyncWebClient
 
 from pydantic_ai import Agent
 from pydantic_ai.models.gemini import GeminiModel
 
-import requests
+import httpx
 import yaml
 import json
 
 from dataclasses import dataclass
+from functools import cache
 
 from lib.utils import *
 from lib.logger import *
@@ -24,8 +34,57 @@ import click
 app_token = os.getenv("SLACK_APP_TOKEN")
 bot_token = os.getenv("SLACK_BOT_TOKEN")
 
-app = App(token=bot_token)
-client = WebClient(token=bot_token)
+app = AsyncApp(token=bot_token)
+client = AsyncWebClient(token=bot_token)
+
+# バックグラウンドで実行中のリアクション処理（GCで破棄されないよう参照を保持する）
+_BACKGROUND_TASKS = set()
+
+# (channel, ts) -> メッセージ本文のLRUキャッシュ
+MSG_CACHE_SIZE = 1024
+_MSG_CACHE: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+
+CONFIG_PATH = "config.yaml"
+CONFIG_CACHE_PATH = f"{CONFIG_PATH}.cache.json"
+
+
+def load_config_cached():
+    """
+    設定ファイルをパースした結果をJSONのスナップショットとして保存し、
+    設定ファイルの内容（SHA-256）が変わっていなければYAMLのパースを省略する
+    """
+    try:
+        with open(CONFIG_PATH, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return load_config(CONFIG_PATH)
+
+    try:
+        with open(CONFIG_CACHE_PATH, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot["sha256"] == digest:
+            return snapshot["config"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    config = load_config(CONFIG_PATH)
+    try:
+        # 数値キーや日付などJSONで元の値に戻せない設定はスナップショットを作らない
+        if json.loads(json.dumps(config)) != config:
+            return config
+        tmp_path = f"{CONFIG_CACHE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sha256": digest, "config": config}, f, ensure_ascii=False)
+        os.replace(tmp_path, CONFIG_CACHE_PATH)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to write config cache: %s", e)
+    return config
+
+
+# Issue作成をまとめるときの最大件数と、後続のリクエストを待つ秒数
+ISSUE_BATCH_SIZE = 10
+ISSUE_BATCH_WAIT = 0.2
 
 
 class Linear:
@@ -36,17 +95,71 @@ class Linear:
             "Authorization": f"{self.api_key}",
             "Content-Type": "application/json",
         }
-
-    def get_uuid_for_team(self, team_name):
+        # 接続をプールしてKeep-Aliveで使い回し、リクエスト毎のTLSハンドシェイクを避ける
+        # HTTP/2で1本の接続に多重化し、ヘッダーもHPACKで圧縮する
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        )
+        # チーム名・状態名は実行中に変わらないので一度解決したらプロセス内で使い回す
+        # チーム名 -> (チームUUID, 状態名（小文字）→stateIdの索引) を取得するタスク
+        self._team_tasks: dict[str, asyncio.Task] = {}
+        # まとめて発行するIssue作成のキューと、それを処理するタスク
+        self._issue_queue: asyncio.Queue | None = None
+        self._issue_batch_task: asyncio.Task | None = None
+
+    async def get_issue_context(self, team_name, state_name=None):
+        """
+        Issueの作成に必要なチームUUIDとstateIdを返すメソッド
+        チームごとに解決は1回だけ行い、同時に呼ばれた場合も同じ取得処理を待つ
         """
-        チーム名からUUIDを取得するメソッド
+        task = self._team_tasks.get(team_name)
+        if task is None:
+            task = asyncio.create_task(self._fetch_team(team_name))
+            self._team_tasks[team_name] = task
+
+        try:
+            # 呼び出し元がキャンセルされても、他の待ち手のために取得処理は続ける
+            team = await asyncio.shield(task)
+        except Exception:
+            self._forget_team_task(team_name, task)
+            raise
+        if team is None:
+            self._forget_team_task(team_name, task)
+            return None, None
+
+        team_id, state_index = team
+        if not state_name:
+            return team_id, None
+
+        state_id = state_index.get(state_name.lower())
+        if state_id is None:
+            logger.error("State '%s' not found in team '%s'.", state_name, team_name)
+        return team_id, state_id
+
+    def _forget_team_task(self, team_name, task):
+        """失敗した取得タスクを捨て、次の呼び出しで取得し直せるようにする"""
+        if self._team_tasks.get(team_name) is task:
+            del self._team_tasks[team_name]
+
+    async def _fetch_team(self, team_name):
+        """
+        チームのUUIDと、状態名（小文字）→stateIdの索引を1回のクエリでまとめて取得する
+        見つからない場合はNoneを返す
         """
         query = """
         query($teamName: String!) {
             teams(filter: {name: {eq: $teamName}}) {
                 nodes {
                     id
-                    name
+                    states {
+                        nodes {
+                            id
+                            name
+                        }
+                    }
                 }
             }
         }
@@ -54,99 +167,213 @@ class Linear:
         variables = {"teamName": team_name}
         data = {"query": query, "variables": variables}
 
-        response = requests.post(self.api_url, json=data, headers=self.headers)
+        response = await self._client.post(self.api_url, json=data)
 
-        if response.status_code == 200:
-            response_data = response.json()
-            if "data" in response_data and "teams" in response_data["data"]:
-                teams = response_data["data"]["teams"]["nodes"]
-                if teams:
-                    return teams[0]["id"]
+        if response.status_code != 200:
+            logger.error(
+                "Failed to fetch team: %s - %s", response.status_code, response.text
+            )
+            return None
+
+        response_data = response.json()
+        teams = response_data.get("data", {}).get("teams", {}).get("nodes", [])
+        if not teams:
+            logger.error("Team '%s' not found in the response.", team_name)
+            return None
+
+        team = teams[0]
+        state_index = {
+            state["name"].lower(): state["id"] for state in team["states"]["nodes"]
+        }
+        return team["id"], state_index
 
-    def get_state_id_by_name(self, state_name):
+    @staticmethod
+    def _issue_input(team_id, title, description, state_id=None):
         """
-        Linear APIを使って、指定された状態名（state_name）に対応するstateId（UUID）を取得する
+        issueCreate に渡す IssueCreateInput を作る
+        state_id（状態ID）が指定された場合のみその状態で発行する
+        IDはこちらで採番し、再送しても同じIssueが重複して作られないようにする
         """
-        query = """
-        query {
-          workflowStates {
-            nodes {
-              id
-              name
-            }
-          }
+        issue_input = {
+            "id": str(uuid.uuid4()),
+            "teamId": team_id,
+            "title": title,
+            "description": description,
         }
-        """
-        data = {"query": query}
-        response = requests.post(self.api_url, json=data, headers=self.headers)
+        if state_id:
+            issue_input["stateId"] = state_id
+        return issue_input
 
-        if response.status_code == 200:
-            response_data = response.json()
-            states = (
-                response_data.get("data", {}).get("workflowStates", []).get("nodes", [])
-            )
-
-            # state_nameに一致する状態のIDを探す
-            for state in states:
-                if (
-                    state["name"].lower() == state_name.lower()
-                ):  # 大文字小文字を区別せず検索
-                    return state["id"]
-
-            logger.error(f"State '{state_name}' not found in the response.")
-            return None
-        else:
-            logger.error(
-                f"Failed to fetch states: {response.status_code} - {response.text}"
-            )
-            return None
-
-    def create_issue(self, team_id, title, description):
+    async def _create_issue(self, issue_input):
         """
-        指定されたチームIDで新しいIssueを作成するメソッド
-        state_id（状態ID）を指定して発行する
+        IssueCreateInput から1件のIssueを作成する
         """
         mutation = """
-        mutation($teamId: String!, $title: String!, $description: String!, $stateId: String!) {
-            issueCreate(input: {
-                teamId: $teamId
-                title: $title
-                description: $description
-            }) {
+        mutation($input: IssueCreateInput!) {
+            issueCreate(input: $input) {
                 issue {
                     id
                     title
-                    description
                 }
             }
         }
         """
+        data = {"query": mutation, "variables": {"input": issue_input}}
 
-        state_id = self.get_state_id_by_name(state_name)
-        variables = {"teamId": team_id, "title": title, "description": description}
-        data = {"query": mutation, "variables": variables}
-
-        response = requests.post(self.api_url, json=data, headers=self.headers)
+        response = await self._client.post(self.api_url, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
-            if (
-                response_data
-                and "data" in response_data
-                and "issueCreate" in response_data["data"]
-            ):
-                return response_data["data"]["issueCreate"]["issue"]
+            result = (response_data.get("data") or {}).get("issueCreate")
+            if result and result.get("issue"):
+                return result["issue"]
             else:
                 logger.error(
-                    "Error: Invalid response data or missing 'data' or 'issueCreate'."
+                    "Error: Invalid response data or missing 'data' or 'issueCreate': %s",
+                    response_data.get("errors"),
                 )
                 return None
         else:
             logger.error(
-                f"Failed to create issue: {response.status_code} - {response.text}"
+                "Failed to create issue: %s - %s", response.status_code, response.text
             )
             return None
 
+    async def create_issue_batched(self, team_id, title, description, state_id=None):
+        """
+        Issueの作成をキューに積み、短時間に集まったものと一緒に1回のmutationで発行する
+        作成されたIssue（id, title）を返し、失敗した場合はNoneを返す
+        """
+        if self._issue_batch_task is None:
+            self._issue_queue = asyncio.Queue()
+            self._issue_batch_task = asyncio.create_task(self._issue_batch_worker())
+
+        issue_input = self._issue_input(team_id, title, description, state_id)
+        future = asyncio.get_running_loop().create_future()
+        await self._issue_queue.put((issue_input, future))
+        return await future
+
+    async def _issue_batch_worker(self):
+        """
+        キューからIssue作成を最大 ISSUE_BATCH_SIZE 件、最初の1件から
+        ISSUE_BATCH_WAIT 秒まで集めてまとめて発行する
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._issue_queue.get()]
+            deadline = loop.time() + ISSUE_BATCH_WAIT
+            while len(batch) < ISSUE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._issue_queue.get(), timeout)
+                    )
+                except TimeoutError:
+                    break
+
+            try:
+                if len(batch) == 1:
+                    issues = [await self._create_issue(batch[0][0])]
+                else:
+                    issues = await self._create_issues([i for i, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), issue in zip(batch, issues):
+                if not future.done():
+                    future.set_result(issue)
+
+    async def _create_issues(self, issue_inputs):
+        """
+        複数のIssueをエイリアス付きの issueCreate を並べた1つのmutationで作成する
+        入力と同じ順序で作成されたIssue（失敗したものはNone）のリストを返す
+        """
+        params = ", ".join(
+            f"$input{i}: IssueCreateInput!" for i in range(len(issue_inputs))
+        )
+        fields = "\n".join(
+            f"a{i}: issueCreate(input: $input{i}) {{ issue {{ id title }} }}"
+            for i in range(len(issue_inputs))
+        )
+        mutation = f"mutation({params}) {{\n{fields}\n}}"
+        variables = {f"input{i}": v for i, v in enumerate(issue_inputs)}
+        data = {"query": mutation, "variables": variables}
+
+        response = await self._client.post(self.api_url, json=data)
+
+        issues = [None] * len(issue_inputs)
+        if response.status_code != 200:
+            # レート制限やサーバーエラーでは1件ずつ再送すると負荷が増えるだけなので失敗とする
+            logger.error(
+                "Failed to create issues: %s - %s", response.status_code, response.text
+            )
+            return issues
+
+        response_data = response.json()
+        errors = response_data.get("errors") or []
+        if errors:
+            logger.error("Errors in batched issueCreate: %s", errors)
+        # いずれかのエイリアスが失敗するとdata全体がnullになることがある
+        results = response_data.get("data") or {}
+        for i in range(len(issue_inputs)):
+            result = results.get(f"a{i}")
+            if result and result.get("issue"):
+                issues[i] = result["issue"]
+
+        # エラーの path から失敗したエイリアスを特定する
+        failed_aliases = {e["path"][0] for e in errors if e.get("path")}
+        others = [
+            i
+            for i, issue in enumerate(issues)
+            if issue is None and f"a{i}" not in failed_aliases
+        ]
+        if not others or not failed_aliases:
+            return issues
+
+        # 失敗したエイリアスに巻き込まれただけのものは作成済みの可能性があるので、
+        # IDで確認してから見つからなかったものだけを作り直す
+        created = await self._find_issues([issue_inputs[i]["id"] for i in others])
+        for i in others:
+            issues[i] = created.get(issue_inputs[i]["id"])
+            if issues[i] is None:
+                issues[i] = await self._create_issue(issue_inputs[i])
+        return issues
+
+    async def _find_issues(self, issue_ids):
+        """
+        指定したIDのうち既に存在するIssueを {id: issue} の辞書で返す
+        """
+        query = """
+        query($ids: [ID!]) {
+            issues(filter: {id: {in: $ids}}) {
+                nodes {
+                    id
+                    title
+                }
+            }
+        }
+        """
+        data = {"query": query, "variables": {"ids": issue_ids}}
+
+        response = await self._client.post(self.api_url, json=data)
+
+        if response.status_code != 200:
+            logger.error(
+                "Failed to fetch issues: %s - %s", response.status_code, response.text
+            )
+            return {}
+
+        response_data = response.json()
+        issues = ((response_data.get("data") or {}).get("issues") or {}).get(
+            "nodes", []
+        )
+        return {issue["id"]: issue for issue in issues}
+
 
 @dataclass
 class Issue:
@@ -160,67 +387,347 @@ class Issue:
         )
 
 
-def llm(body) -> Issue | None:
-    model = GeminiModel(
-        config["system"]["llm"]["model"],
-    )
+LLM_CACHE_DIR = ".llm-cache"
+# キャッシュに保持する応答の最大件数。超えたら最後に使われた時刻が古いものから捨てる
+LLM_CACHE_SIZE = 1000
+SYSTEM_PROMPT = (
+    "渡された文字列からGitHubのIssueのタイトルを50文字にまとめて生成します。"
+)
+
+
+@cache
+def open_llm_cache():
+    """LLMの応答キャッシュ（プロセス間で永続化）を開く"""
+    os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+    return shelve.open(os.path.join(LLM_CACHE_DIR, "responses"))
+
+
+class CachedAgent:
+    """
+    AgentをラップしてLLMの応答をキャッシュするクラス
+    同じモデル・プロンプト・パラメータ・本文の組み合わせでは再度LLMを呼び出さない
+    """
+
+    def __init__(
+        self,
+        agent,
+        cache,
+        model_name,
+        max_tokens,
+        temperature,
+        max_size=LLM_CACHE_SIZE,
+    ):
+        self.agent = agent
+        self.cache = cache
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.max_size = max_size
+        # shelveはスレッドセーフではないので、ワーカースレッドからの操作を直列化する
+        self._lock = threading.Lock()
+
+    @property
+    def cacheable(self):
+        # temperatureが0以外の場合は出力が確率的なのでキャッシュしない
+        return self.temperature == 0
+
+    def cache_key(self, body):
+        payload = json.dumps(
+            {
+                "m": self.model_name,
+                "s": SYSTEM_PROMPT,
+                "t": self.temperature,
+                "mt": self.max_tokens,
+                "b": body,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_get(self, key):
+        """キャッシュから応答を取り出し、最後に使われた時刻を更新する"""
+        with self._lock:
+            entry = self.cache.get(key)
+            if not isinstance(entry, dict):
+                return None
+            entry["used"] = time.time()
+            self.cache[key] = entry
+            return entry["output"]
+
+    def _cache_put(self, key, output):
+        """応答をキャッシュに保存し、上限を超えたら古いものから捨てる"""
+        with self._lock:
+            self.cache[key] = {"output": output, "used": time.time()}
+            if len(self.cache) > self.max_size:
+                # 毎回全件を走査しないよう、上限の9割まで一度に減らす
+                entries = sorted(
+                    self.cache.items(),
+                    key=lambda item: (
+                        item[1].get("used", 0) if isinstance(item[1], dict) else 0
+                    ),
+                )
+                for k, _ in entries[: len(entries) - self.max_size * 9 // 10]:
+                    del self.cache[k]
+            self.cache.sync()
+
+    async def _generate(self, body) -> str:
+        # ストリーミングで受け取り、応答が揃い次第（エラーなら途中で）返す
+        async with self.agent.run_stream(body) as result:
+            return await result.get_output()
+
+    async def run(self, body) -> str:
+        if not self.cacheable:
+            return await self._generate(body)
+
+        key = self.cache_key(body)
+        # ディスクI/Oでイベントループを止めないようにワーカースレッドで実行する
+        output = await asyncio.to_thread(self._cache_get, key)
+        if output is not None:
+            logger.info("LLM cache hit: %s", key)
+            return output
+
+        output = await self._generate(body)
+        # 空の応答はタイトルとして使えないのでキャッシュしない
+        if output:
+            await asyncio.to_thread(self._cache_put, key, output)
+        return output
+
+
+@cache
+def get_agent() -> CachedAgent:
+    """
+    GeminiModelとAgentを生成する
+    イベント毎に生成しないよう、初回呼び出し時に一度だけ生成して使い回す
+    """
+    llm_config = config["system"]["llm"]
+    model = GeminiModel(llm_config["model"])
 
     # Pydantic AIの設定
     agent = Agent(
         model,
-        system_prompt="渡された文字列からGitHubのIssueのタイトルを50文字にまとめて生成します。",
-        result_type=str,
-        max_tokens=config["system"]["llm"]["max_tokens"],
-        temperature=config["system"]["llm"]["temperature"],
+        system_prompt=SYSTEM_PROMPT,
+        output_type=str,
+        model_settings={
+            "max_tokens": llm_config["max_tokens"],
+            "temperature": llm_config["temperature"],
+        },
+    )
+    return CachedAgent(
+        agent,
+        open_llm_cache(),
+        model_name=llm_config["model"],
+        max_tokens=llm_config["max_tokens"],
+        temperature=llm_config["temperature"],
     )
 
-    logger.info(f"Received body: {body}")
-    result = agent.run_sync(body)
-    logger.info(f"Generating issue title with body: {result}")
+
+async def llm(body) -> Issue | None:
+    logger.info("Received body: %s", body)
+    output = await get_agent().run(body)
+    logger.info("Generating issue title with body: %s", output)
 
     issue = Issue(
         id="",
-        title=result.output,
+        title=output,
         description=body,
     )
 
-    # `result` は AgentRunResult オブジェクトなので、output属性を文字列として取り出す
     return issue
 
 
+# 優先度順に並べたメンションのコマンド
+_COMMANDS = ("ping", "config", "help")
+
+HELP_TEXT = (
+    "このボットは、特定のリアクションが付いたメッセージに対して、LinearでIssueを作成します。"
+    "\nリアクションの設定はconfig.yamlで行います。"
+    "\n\nhelp: このメッセージを表示します"
+    "\nping: ボットの応答を確認します"
+    "\nconfig: 現在の設定を表示します"
+)
+
+
+def build_config_text(config):
+    """configコマンドで返す設定の一覧（起動後は変わらないので一度だけ作る）"""
+    lines = ["現在の設定は以下の通りです:"]
+    lines.extend(f"{k}: {v}" for k, v in config.items())
+    return "\n".join(lines) + "\n"
+
+
 @app.event("app_mention")
-def healthcheck(body, say):
+async def healthcheck(body, say):
     """アプリがメンションされた時のヘルスチェック"""
     mention = body["event"]
-    if "ping" in mention["text"].lower():
+    # 記号や日本語が続いても拾えるよう、英字の連続だけを単語として取り出す
+    tokens = set(re.findall(r"[a-z]+", mention["text"].lower()))
+    command = next((c for c in _COMMANDS if c in tokens), None)
+    if command == "ping":
         text = "pong"
-        channel = mention["channel"]
-        thread_ts = mention["ts"]
-        say(text=text, channel=channel, thread_ts=thread_ts)
-    elif "config" in mention["text"].lower():
-        text = "現在の設定は以下の通りです:\n"
-        for k, v in config.items():
-            text += f"{k}: {v}\n"
-        channel = mention["channel"]
-        thread_ts = mention["ts"]
-        say(text=text, channel=channel, thread_ts=thread_ts)
-    elif "help" in mention["text"].lower():
-        text = "このボットは、特定のリアクションが付いたメッセージに対して、LinearでIssueを作成します。"
-        text += "\nリアクションの設定はconfig.yamlで行います。"
-        text += "\n\nhelp: このメッセージを表示します"
-        text += "\nping: ボットの応答を確認します"
-        text += "\nconfig: 現在の設定を表示します"
-        channel = mention["channel"]
-        thread_ts = mention["ts"]
-        say(text=text, channel=channel, thread_ts=thread_ts)
+    elif command == "config":
+        text = _CONFIG_TEXT
+    elif command == "help":
+        text = HELP_TEXT
     else:
-        pass
+        return
+
+    await say(text=text, channel=mention["channel"], thread_ts=mention["ts"])
+
+
+def _cache_message(channel, ts, text):
+    """メッセージのテキストをキャッシュに登録し、上限を超えたら古いものから捨てる"""
+    _MSG_CACHE[(channel, ts)] = text
+    _MSG_CACHE.move_to_end((channel, ts))
+    if len(_MSG_CACHE) > MSG_CACHE_SIZE:
+        _MSG_CACHE.popitem(last=False)
+
+
+def _get_cached_message(channel, ts):
+    """キャッシュからメッセージのテキストを取得する（無ければNone）"""
+    text = _MSG_CACHE.get((channel, ts))
+    if text is not None:
+        _MSG_CACHE.move_to_end((channel, ts))
+    return text
+
+
+# 本文をそのままキャッシュしてよいメッセージのsubtype（Noneは通常のメッセージ）
+# message_replied などは ts が別のメッセージを指し、本文も持たないので対象外
+_CACHEABLE_MESSAGE_SUBTYPES = frozenset(
+    {None, "bot_message", "thread_broadcast", "file_share"}
+)
+
+
+@app.event("message")
+async def cache_message(event):
+    """
+    受信したメッセージのテキストを覚えておき、リアクション時の
+    conversations_history 呼び出しを省略できるようにする
+    """
+    subtype = event.get("subtype")
+    if subtype == "message_changed":
+        # 編集されたメッセージは古い本文を返さないようにキャッシュから外す
+        _MSG_CACHE.pop((event["channel"], event["message"]["ts"]), None)
+    elif subtype == "message_deleted":
+        _MSG_CACHE.pop((event["channel"], event["deleted_ts"]), None)
+    elif (
+        subtype in _CACHEABLE_MESSAGE_SUBTYPES
+        and not event.get("hidden")
+        and "text" in event
+    ):
+        _cache_message(event["channel"], event["ts"], event["text"])
+
+
+async def _process_reaction(value, channel, thread_ts, message_ts, say):
+    """リアクションが付いたメッセージからIssueを作成する（バックグラウンドで実行）"""
+    try:
+        message_text = _get_cached_message(channel, message_ts)
+        if message_text is None:
+            # キャッシュに無い場合は conversations_history を使ってメッセージを取得
+            response = await client.conversations_history(
+                channel=channel, latest=message_ts, limit=1, inclusive=True
+            )
+
+            # レスポンスにメッセージが含まれているかを確認
+            messages = response.get("messages", [])
+            if not messages:
+                logger.warning("No messages found for this timestamp.")
+                return  # メッセージがない場合は処理を終了
+
+            # メッセージのテキストを取得
+            message = messages[0]
+            message_text = message["text"]
+            # スレッドの返信や削除済みのメッセージでは別のメッセージが返るので、
+            # 同じメッセージの場合だけキャッシュする
+            if message.get("ts") == message_ts:
+                _cache_message(channel, message_ts, message_text)
+
+        # チームUUID・stateIdの取得とLLMによるタイトル生成は独立しているので並行して実行する
+        if os.getenv("DEBUG") == "true":
+            issue = await llm(message_text)
+            team_id, state_id = None, None
+        else:
+            issue, (team_id, state_id) = await asyncio.gather(
+                llm(message_text),
+                linear.get_issue_context(value["team_id"], value.get("state")),
+            )
+        if not issue:
+            await say(
+                "Issueのタイトルを生成できませんでした。",
+                channel=channel,
+                thread_ts=thread_ts,
+            )
+            logger.error("Issueのタイトルを生成できませんでした。")
+            return
+
+        title = issue.title
+        description = issue.description
+
+        # Issueを作成
+        if os.getenv("DEBUG") == "true":
+            logger.debug("Creating issue with title: %s", title)
+            pass
+        elif team_id is None:
+            # チームが解決できないまま積むと同じバッチの他のIssueまで巻き込んで失敗する
+            await say(
+                "Issueの作成に失敗しました。",
+                channel=channel,
+                thread_ts=thread_ts,
+            )
+            logger.error("チーム '%s' のIDを取得できませんでした。", value["team_id"])
+        else:
+            issue = await linear.create_issue_batched(
+                team_id=team_id,
+                title=title,
+                description=description,
+                state_id=state_id,
+            )
+            if issue:
+                await say(
+                    f"新しいIssueが作成されました: {issue['title']} (URL: https://linear.app/ivry/issue/{issue['id']})",
+                    channel=channel,
+                    thread_ts=thread_ts,
+                )
+                logger.info(
+                    "Issueが作成されました: %s (ID: %s)", issue["title"], issue["id"]
+                )
+            else:
+                await say(
+                    "Issueの作成に失敗しました。",
+                    channel=channel,
+                    thread_ts=thread_ts,
+                )
+                logger.error("Issueの作成に失敗しました。")
+    except Exception as e:
+        logger.error("Error retrieving message: %s", e)
+        await say(
+            "メッセージの取得に失敗しました。",
+            channel=channel,
+            thread_ts=thread_ts,
+        )
+
+
+def build_reaction_index(config):
+    """
+    (リアクション名, メンション) から reaction_mentions の設定を引く辞書を作る
+    同じ組み合わせが複数ある場合は先に書かれた設定を優先する
+    """
+    index = {}
+    for value in config.get("reaction_mentions", []):
+        index.setdefault((value["reaction"], value["mention"]), value)
+    return index
 
 
 # 特定のリアクションが付いた時にスレッドで返信するリスナー
 @app.event("reaction_added")
-def reaction_handler(body, say):
+async def reaction_handler(body, say, ack):
+    # Slackの3秒以内の応答要件を満たすため、重い処理の前に即座にackする
+    await ack()
+
     reaction = body["event"]
+    # 設定されていないリアクションが大半なので、他の処理より先に弾く
+    if reaction["reaction"] not in _CONFIGURED_REACTIONS:
+        return
+
     item = reaction["item"]
     channel = item["channel"]
     thread_ts = item.get("ts", None)
@@ -229,83 +736,24 @@ def reaction_handler(body, say):
     timestamp = reaction["event_ts"]
     message_ts = item["ts"]
 
-    logger.debug(f"Reaction added: {reaction_name} by user {user} in channel {channel}")
+    logger.debug(
+        "Reaction added: %s by user %s in channel %s", reaction_name, user, channel
+    )
 
-    for k, v in config.items():
-        if k != "reaction_mentions":
-            continue
-        for value in v:
-            if value["reaction"] == reaction_name and value["mention"] == f"<@{user}>":
-                logger.info(f"マッチしたリアクション: {reaction_name}")
-                text = f"{value['mention']} やります！"
-                say(text=text, channel=channel, thread_ts=thread_ts)
+    value = _REACTION_INDEX.get((reaction_name, f"<@{user}>"))
+    if value is None:
+        return
 
-                try:
-                    # conversations_history を使ってメッセージを取得
-                    response = client.conversations_history(
-                        channel=channel, latest=message_ts, limit=1, inclusive=True
-                    )
+    logger.info("マッチしたリアクション: %s", reaction_name)
+    text = f"{value['mention']} やります！"
+    await say(text=text, channel=channel, thread_ts=thread_ts)
 
-                    # レスポンスにメッセージが含まれているかを確認
-                    messages = response.get("messages", [])
-                    if not messages:
-                        logger.warning("No messages found for this timestamp.")
-                        return  # メッセージがない場合は処理を終了
-
-                    # メッセージのテキストを取得
-                    message = messages[0]
-                    message_text = message["text"]
-
-                    issue = llm(message_text)
-                    if not issue:
-                        say(
-                            "Issueのタイトルを生成できませんでした。",
-                            channel=channel,
-                            thread_ts=thread_ts,
-                        )
-                        logger.error("Issueのタイトルを生成できませんでした。")
-                        return
-
-                    title = issue.title
-                    description = issue.description
-
-                    # Issueを作成
-                    if os.getenv("DEBUG") == "true":
-                        logger.debug(f"Creating issue with title: {title}")
-                        pass
-                    else:
-                        issue = linear.create_issue(
-                            team_id=linear.get_uuid_for_team(value["team_id"]),
-                            title=title,
-                            description=description,
-                        )
-                        if issue:
-                            say(
-                                f"新しいIssueが作成されました: {issue['title']} (URL: https://linear.app/ivry/issue/{issue['id']})",
-                                channel=channel,
-                                thread_ts=thread_ts,
-                            )
-                            logger.info(
-                                f"Issueが作成されました: {issue['title']} (ID: {issue['id']})"
-                            )
-                        else:
-                            say(
-                                "Issueの作成に失敗しました。",
-                                channel=channel,
-                                thread_ts=thread_ts,
-                            )
-                            logger.error("Issueの作成に失敗しました。")
-                except Exception as e:
-                    logger.error(f"Error retrieving message: {e}")
-                    say(
-                        "メッセージの取得に失敗しました。",
-                        channel=channel,
-                        thread_ts=thread_ts,
-                    )
-                    return
-                break
-        else:
-            continue
+    # LLMとLinearの呼び出しはバックグラウンドタスクで処理する
+    task = asyncio.create_task(
+        _process_reaction(value, channel, thread_ts, message_ts, say)
+    )
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
 
 
 @click.command()
@@ -319,11 +767,12 @@ def main(debug):
         os.environ["DEBUG"] = "false"
         logger.setLevel("INFO")
         logger.info("Debug mode is disabled.")
-    logger.debug(f"Configuration loaded: {json.dumps(config, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Configuration loaded: %s", json.dumps(config, indent=2))
 
     logger.info("Starting the Slack bot...")
-    handler = SocketModeHandler(app, app_token)
-    handler.start()
+    handler = AsyncSocketModeHandler(app, app_token)
+    asyncio.run(handler.start_async())
     logger.info("Slack bot is running.")
 
 
@@ -333,5 +782,9 @@ if __name__ == "__main__":
     )
     logger.info("Linear API initialized successfully.")
 
-    config = load_config()
+    config = load_config_cached()
+    _REACTION_INDEX = build_reaction_index(config)
+    _CONFIGURED_REACTIONS = frozenset(reaction for reaction, _ in _REACTION_INDEX)
+    _CONFIG_TEXT = build_config_text(config)
+    get_agent()
     main()